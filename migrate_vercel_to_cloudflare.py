@@ -1,91 +1,228 @@
 #!/usr/bin/env python3
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import argparse
+import logging
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Prefer orjson for (de)serializing API payloads when it is installed.
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj):
+        return json.dumps(obj).encode("utf-8")
 
 # Vercel API base URL
 VERCEL_API_BASE = "https://api.vercel.com"
 
+# Vercel project endpoints, built once. Query strings are passed via params=
+# so that values like pagination cursors are URL-encoded by requests.
+VERCEL_PROJECTS_URL = f"{VERCEL_API_BASE}/v9/projects"
+VERCEL_PROJECT_URL = VERCEL_PROJECTS_URL + "/{project_id}"
+
 # Cloudflare API base URL
 CLOUDFLARE_API_BASE = "https://api.cloudflare.com/client/v4"
 
-def get_vercel_projects(api_token):
-    """Fetches the list of projects from Vercel."""
-    headers = {
-        "Authorization": f"Bearer {api_token}"
-    }
-    url = f"{VERCEL_API_BASE}/v9/projects"
-    projects = []
-    while url:
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()  # Raise an exception for bad status codes
-            data = response.json()
-            projects.extend(data.get('projects', []))
-            # Handle pagination
+logger = logging.getLogger(__name__)
+
+# Maximum number of Vercel projects whose details are fetched concurrently.
+# Kept small to stay within API rate limits.
+MAX_WORKERS = 8
+
+# Number of threads creating Cloudflare Pages projects, and how many fetched
+# Vercel projects may wait for them before the fetchers are held back.
+CF_WORKERS = 4
+DETAILS_QUEUE_SIZE = 16
+
+# How often (in seconds) blocked pipeline threads check whether to stop.
+_STOP_POLL_INTERVAL = 0.5
+
+# Projects requested per Vercel list page (the API default is 20, maximum 100).
+VERCEL_PAGE_LIMIT = 100
+
+# Vercel requests are all GETs, so rate limits, 5xx responses and connection
+# or read errors are retried with exponential backoff, honouring Retry-After.
+# Once retries are exhausted the last response is returned, so the usual
+# status check reports it.
+_vercel_retry = Retry(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(['GET']),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+class _RateLimitRetry(Retry):
+    """Retry that only honours Retry-After on 429, not also on 413/503."""
+    RETRY_AFTER_STATUS_CODES = frozenset([429])
+
+# Creating a Cloudflare project is not idempotent: after a 5xx or a dropped
+# connection the project may already exist. Only retry when the request was
+# certainly not processed, i.e. connection errors and 429 rate limits.
+_cf_retry = _RateLimitRetry(
+    total=5,
+    read=0,
+    other=0,
+    backoff_factor=0.5,
+    status_forcelist=(429,),
+    allowed_methods=frozenset(['GET', 'POST']),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+# One persistent session per API host so connections (and TLS handshakes)
+# are reused across calls. The Authorization header is set in main().
+_vercel_session = requests.Session()
+# Each concurrent project fetch can have several Vercel requests in flight.
+_vercel_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS * 3, max_retries=_vercel_retry))
+
+_cf_session = requests.Session()
+_cf_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=_cf_retry))
+
+def _json(response):
+    """Parses a JSON response body, raising a RequestException if it is invalid."""
+    try:
+        return _loads(response.content)
+    except ValueError as e:
+        raise requests.exceptions.InvalidJSONError(e, response=response)
+
+def _request_json(session, method, url, **kwargs):
+    """Sends a request and returns its parsed JSON body.
+
+    Raises a RequestException for bad status codes or invalid JSON.
+    """
+    response = session.request(method, url, **kwargs)
+    response.raise_for_status()  # Raise an exception for bad status codes
+    return _json(response)
+
+def _log_response_error(error, subject):
+    """Logs the status and the start of the body of a failed response, if any.
+
+    ``subject`` names what was being requested, so concurrent workers' log
+    lines can be told apart.
+    """
+    response = error.response
+    if response is not None:
+        logger.error("Response status for %s: %s", subject, response.status_code)
+        logger.error("Response text for %s: %s", subject, response.content[:500].decode(errors='replace'))
+
+def iter_vercel_projects():
+    """Yields projects from Vercel page by page.
+
+    The next page is requested in the background while the current page's
+    projects are being consumed, so pagination round-trips overlap with
+    processing. Stops after logging an error if a page cannot be fetched.
+    """
+    params = {'limit': VERCEL_PAGE_LIMIT}
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        pending = prefetcher.submit(_request_json, _vercel_session, 'GET', VERCEL_PROJECTS_URL, params=params)
+        while pending:
+            try:
+                data = pending.result()
+            except requests.exceptions.RequestException as e:
+                logger.error("Error fetching Vercel projects: %s", e)
+                _log_response_error(e, "Vercel projects")
+                return
+            # Handle pagination: start fetching the next page before yielding this one
             pagination = data.get('pagination', {})
             next_page = pagination.get('next')
             if next_page:
-                url = f"{VERCEL_API_BASE}/v9/projects?until={next_page}"
+                params = {'limit': VERCEL_PAGE_LIMIT, 'until': next_page}
+                pending = prefetcher.submit(_request_json, _vercel_session, 'GET', VERCEL_PROJECTS_URL, params=params)
             else:
-                url = None
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching Vercel projects: {e}")
-            if response is not None:
-                print(f"Response status: {response.status_code}")
-                print(f"Response text: {response.text}")
-            return None
-    return projects
-
-def get_vercel_project_details(api_token, project_id):
-    """Fetches detailed information for a specific Vercel project."""
-    headers = {
-        "Authorization": f"Bearer {api_token}"
-    }
-    details = {}
+                pending = None
+            # Only the ID and name are used; drop the rest of each (large) project object.
+            yield from ({'id': project.get('id'), 'name': project.get('name')} for project in data.get('projects', []))
 
-    # Get basic project info (includes build settings)
+def get_vercel_project_info(project_id):
+    """Fetches basic information (including build settings) for a Vercel project."""
+    url_project = VERCEL_PROJECT_URL.format(project_id=project_id)
     try:
-        url_project = f"{VERCEL_API_BASE}/v9/projects/{project_id}"
-        response = requests.get(url_project, headers=headers)
-        response.raise_for_status()
-        details['info'] = response.json()
+        return _request_json(_vercel_session, 'GET', url_project)
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching Vercel project info for {project_id}: {e}")
+        logger.error("Error fetching Vercel project info for %s: %s", project_id, e)
         return None
 
-    # Get environment variables
-    try:
-        url_env = f"{VERCEL_API_BASE}/v9/projects/{project_id}/env"
-        response = requests.get(url_env, headers=headers)
-        response.raise_for_status()
-        details['env_vars'] = response.json().get('envs', [])
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching Vercel env vars for {project_id}: {e}")
-        # Continue even if env vars fail, maybe project has none
-        details['env_vars'] = []
+def get_vercel_project_extras(project_id):
+    """Fetches the environment variables and domains of a Vercel project.
 
-    # Get domains
-    try:
-        url_domains = f"{VERCEL_API_BASE}/v9/projects/{project_id}/domains"
-        response = requests.get(url_domains, headers=headers)
-        response.raise_for_status()
-        details['domains'] = response.json().get('domains', [])
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching Vercel domains for {project_id}: {e}")
-        # Continue even if domains fail
-        details['domains'] = []
+    Both endpoints are requested concurrently over the shared Vercel session.
+    A failing endpoint yields an empty list, maybe the project has none.
+    """
+    url_project = VERCEL_PROJECT_URL.format(project_id=project_id)
+    endpoints = {
+        'env_vars': (url_project + "/env", 'env vars', 'envs'),
+        'domains': (url_project + "/domains", 'domains', 'domains'),
+    }
+    with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+        futures = {key: executor.submit(_request_json, _vercel_session, 'GET', url) for key, (url, _, _) in endpoints.items()}
 
+    extras = {}
+    for key, (_, label, field) in endpoints.items():
+        try:
+            extras[key] = futures[key].result().get(field, [])
+        except requests.exceptions.RequestException as e:
+            logger.error("Error fetching Vercel %s for %s: %s", label, project_id, e)
+            extras[key] = []
+    return extras
+
+def is_github_project(vercel_info):
+    """Returns True if the Vercel project is linked to a GitHub repository."""
+    return (vercel_info.get('link') or {}).get('type') == 'github'
+
+def get_vercel_project_details(project_id, stop=None):
+    """Fetches detailed information for a specific Vercel project.
+
+    Environment variables and domains are only fetched for GitHub-linked
+    projects, since other projects are not migrated automatically. If the
+    optional ``stop`` event is set once the info has been fetched, the
+    remaining requests are skipped and None is returned.
+    """
+    info = get_vercel_project_info(project_id)
+    if info is None or (stop is not None and stop.is_set()):
+        return None
+
+    details = {'info': info}
+    if is_github_project(info):
+        details.update(get_vercel_project_extras(project_id))
     return details
 
-def create_cloudflare_pages_project(cf_api_token, cf_account_id, vercel_project_details):
+def map_environment_variables(vercel_env_vars):
+    """Splits Vercel env vars into Cloudflare production and preview variables.
+
+    Returns a (production, preview) tuple of name -> value dicts.
+    """
+    # Vercel API v9 env endpoint returns 'target' as array: ['production', 'preview', 'development']
+    # WARNING: 'value' holds the actual value. Handle securely.
+    # Cloudflare expects simple key-value pairs for non-secret vars.
+    # Secrets need different handling (not fully supported via basic create API? Check CF docs)
+    # For now, treat all as plain text (regardless of 'type') for simplicity in this example.
+    # TODO: Implement proper secret handling if CF API supports it during creation.
+    pairs = []
+    for var in vercel_env_vars:
+        var_name = var.get('key')
+        var_value = var.get('value')
+        if var_name and var_value:
+            targets = var.get('target') or []
+            pairs.append((var_name, var_value, {targets} if isinstance(targets, str) else set(targets)))
+
+    environment_variables = {name: value for name, value, targets in pairs if 'production' in targets}
+    preview_environment_variables = {name: value for name, value, targets in pairs if 'preview' in targets}
+    return environment_variables, preview_environment_variables
+
+def create_cloudflare_pages_project(cf_account_id, vercel_project_details):
     """Creates a Cloudflare Pages project based on Vercel project details."""
-    headers = {
-        "Authorization": f"Bearer {cf_api_token}",
-        "Content-Type": "application/json"
-    }
     url = f"{CLOUDFLARE_API_BASE}/accounts/{cf_account_id}/pages/projects"
 
     vercel_info = vercel_project_details.get('info', {})
@@ -95,69 +232,52 @@ def create_cloudflare_pages_project(cf_api_token, cf_account_id, vercel_project_
 
     project_name = vercel_info.get('name')
     if not project_name:
-        print("Skipping project: Missing name in Vercel details.")
+        logger.warning("Skipping project %s: Missing name in Vercel details.", vercel_info.get('id'))
         return None
 
     # --- Map Vercel settings to Cloudflare Pages --- 
     # This mapping is complex and depends heavily on the Vercel project type.
     # Cloudflare Pages primarily works with Git repos or direct uploads.
-    # This script currently assumes a Git-connected project on Vercel.
-    
-    repo_info = vercel_info.get('link')
-    build_settings = vercel_info.get('build', {})
-    framework = vercel_info.get('framework')
-    
-    # Basic build config mapping (Needs refinement based on actual Vercel project types)
-    build_config = {
-        "build_command": vercel_info.get('buildCommand'),
-        "output_dir": vercel_info.get('outputDirectory'),
-        "root_dir": vercel_info.get('rootDirectory') or "/", # Default root
-        "web_analytics_tag": None, # Optional
-        "web_analytics_token": None # Optional
-    }
+    # This needs to be adjusted based on whether it's a Git project or direct upload.
+    # This script currently assumes a GitHub-connected project on Vercel.
+    if not is_github_project(vercel_info):
+        logger.warning("Skipping project '%s': Not linked to a GitHub repository or link info missing.", project_name)
+        logger.warning("Project '%s': Cloudflare Pages API project creation primarily supports Git repos or direct uploads.", project_name)
+        logger.warning("Project '%s': Manual migration or direct upload might be needed for non-Git projects.", project_name)
+        return None
+
+    # Read the Vercel settings once; the payload below only references these locals.
+    repo_info = vercel_info['link']
+    production_branch = vercel_info.get('productionBranch') or 'main' # Default to main
+    build_command = vercel_info.get('buildCommand')
+    output_dir = vercel_info.get('outputDirectory')
+    root_dir = vercel_info.get('rootDirectory') or "/" # Default root
+    repo_owner = repo_info.get('org')
+    repo_name = repo_info.get('repo')
 
     # Environment variables mapping (handle sensitive values appropriately)
     # Note: Cloudflare Pages has 'preview' and 'production' environments.
     # Vercel has 'production', 'preview', 'development'. We map Vercel's production/preview.
-    environment_variables = {}
-    preview_environment_variables = {}
-    for var in vercel_env_vars:
-        # Simple mapping: put all vars in production, duplicate for preview if applicable
-        # Vercel API v9 env endpoint returns 'target' as array: ['production', 'preview', 'development']
-        targets = var.get('target', [])
-        var_name = var.get('key')
-        var_value = var.get('value') # WARNING: This fetches the actual value. Handle securely.
-        var_type = var.get('type') # 'secret', 'encrypted', 'plain'
-        
-        if var_name and var_value:
-            # Cloudflare expects simple key-value pairs for non-secret vars.
-            # Secrets need different handling (not fully supported via basic create API? Check CF docs)
-            # For now, treat all as plain text for simplicity in this example.
-            # TODO: Implement proper secret handling if CF API supports it during creation.
-            if 'production' in targets:
-                environment_variables[var_name] = var_value
-            if 'preview' in targets:
-                 preview_environment_variables[var_name] = var_value
+    environment_variables, preview_environment_variables = map_environment_variables(vercel_env_vars)
 
     # --- Prepare Cloudflare API Payload --- 
-    # This needs to be adjusted based on whether it's a Git project or direct upload.
-    # Assuming Git for now.
-    if not repo_info or repo_info.get('type') != 'github': # Assuming GitHub for now
-        print(f"Skipping project '{project_name}': Not linked to a GitHub repository or link info missing.")
-        print("Cloudflare Pages API project creation primarily supports Git repos or direct uploads.")
-        print("Manual migration or direct upload might be needed for non-Git projects.")
-        return None
-
+    # Basic build config mapping (Needs refinement based on actual Vercel project types)
     payload = {
         "name": project_name,
-        "production_branch": vercel_info.get('productionBranch') or 'main', # Default to main
-        "build_config": build_config,
+        "production_branch": production_branch,
+        "build_config": {
+            "build_command": build_command,
+            "output_dir": output_dir,
+            "root_dir": root_dir,
+            "web_analytics_tag": None, # Optional
+            "web_analytics_token": None # Optional
+        },
         "source": {
             "type": "github",
             "config": {
-                "owner": repo_info.get('org'),
-                "repo_name": repo_info.get('repo'),
-                "production_branch": vercel_info.get('productionBranch') or 'main',
+                "owner": repo_owner,
+                "repo_name": repo_name,
+                "production_branch": production_branch,
                 "pr_comments_enabled": True, # Default
                 "deployments_enabled": True # Default
             }
@@ -174,19 +294,16 @@ def create_cloudflare_pages_project(cf_api_token, cf_account_id, vercel_project_
 
     # --- Make the API Call --- 
     try:
-        print(f"Attempting to create Cloudflare Pages project for: {project_name}")
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        result = response.json()
-        print(f"Successfully created Cloudflare Pages project: {result.get('result', {}).get('name')}")
-        print(f"Subdomain: {result.get('result', {}).get('subdomain')}")
+        logger.info("Attempting to create Cloudflare Pages project for: %s", project_name)
+        result = _request_json(_cf_session, 'POST', url, data=_dumps(payload), headers={"Content-Type": "application/json"})
+        cf_project = result.get('result') or {}
+        logger.info("Successfully created Cloudflare Pages project: %s", cf_project.get('name'))
+        logger.info("Subdomain for %s: %s", project_name, cf_project.get('subdomain'))
         # TODO: Add logic to configure custom domains using CF API after project creation.
         return result.get('result')
     except requests.exceptions.RequestException as e:
-        print(f"Error creating Cloudflare Pages project for {project_name}: {e}")
-        if response is not None:
-            print(f"Response status: {response.status_code}")
-            print(f"Response text: {response.text}")
+        logger.error("Error creating Cloudflare Pages project for %s: %s", project_name, e)
+        _log_response_error(e, f"Cloudflare Pages project {project_name}")
         return None
 
 def main():
@@ -198,41 +315,123 @@ def main():
 
     args = parser.parse_args()
 
-    print("Fetching Vercel projects...")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s [%(threadName)s] %(message)s')
+
+    _vercel_session.headers["Authorization"] = f"Bearer {args.vercel_token}"
+    _cf_session.headers["Authorization"] = f"Bearer {args.cf_token}"
+
+    migrate(args)
+    # Not closed on an interrupt: fetch threads may still be finishing a request.
+    _vercel_session.close()
+    _cf_session.close()
+
+    logger.info("Migration process finished.")
+
+def migrate(args):
+    """Runs the migration for a single project or all Vercel projects."""
+    logger.info("Fetching Vercel projects...")
     if args.project_id:
-        print(f"Fetching details for specific project ID: {args.project_id}")
-        project_details = get_vercel_project_details(args.vercel_token, args.project_id)
+        logger.info("Fetching details for specific project ID: %s", args.project_id)
+        project_details = get_vercel_project_details(args.project_id)
         if project_details:
-            create_cloudflare_pages_project(args.cf_token, args.cf_account_id, project_details)
+            create_cloudflare_pages_project(args.cf_account_id, project_details)
         else:
-            print(f"Could not fetch details for project {args.project_id}")
+            logger.error("Could not fetch details for project %s", args.project_id)
     else:
-        vercel_projects = get_vercel_projects(args.vercel_token)
-        if not vercel_projects:
-            print("Failed to fetch Vercel projects or no projects found.")
+        # Two-stage pipeline: the Vercel fetchers put (project, details) on the
+        # queue while the Cloudflare workers drain it, so GETs and POSTs overlap.
+        # The stop event tells both stages to give up early (e.g. on Ctrl-C).
+        details_q = queue.Queue(maxsize=DETAILS_QUEUE_SIZE)
+        stop = threading.Event()
+        creators = [
+            threading.Thread(target=_create_projects_worker, args=(args, details_q, stop), name=f"cf-create-{i}", daemon=True)
+            for i in range(CF_WORKERS)
+        ]
+        for creator in creators:
+            creator.start()
+
+        executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="vercel-fetch")
+        project_count = 0
+        try:
+            fetches = []
+            for project in iter_vercel_projects():
+                project_count += 1
+                if not project.get('id'):
+                    logger.warning("Skipping Vercel project %s: Missing ID.", project.get('name'))
+                    continue
+                fetches.append(executor.submit(_fetch_project_worker, project, details_q, stop))
+
+            # Wait with timeouts rather than blocking joins, so that Ctrl-C is
+            # handled promptly instead of once some thread happens to finish.
+            while wait(fetches, timeout=_STOP_POLL_INTERVAL).not_done:
+                pass
+            executor.shutdown()
+
+            # One sentinel per Cloudflare worker, queued after every fetched project.
+            for _ in creators:
+                details_q.put(None)
+            for creator in creators:
+                while creator.is_alive():
+                    creator.join(_STOP_POLL_INTERVAL)
+        except BaseException:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        if not project_count:
+            logger.error("Failed to fetch Vercel projects or no projects found.")
+        else:
+            logger.info("Processed %d Vercel projects.", project_count)
+
+def _fetch_project_worker(project, details_q, stop):
+    """Fetches a project's Vercel details and queues them for Cloudflare creation."""
+    if stop.is_set():
+        return
+    try:
+        project_details = get_vercel_project_details(project['id'], stop)
+    except Exception:
+        # Once stopping, failures (e.g. no new executors at interpreter
+        # shutdown) are expected and the result would be dropped anyway.
+        if stop.is_set():
+            return
+        logger.exception("Unexpected error fetching Vercel project %s", project['id'])
+        project_details = None
+    while not stop.is_set():
+        try:
+            details_q.put((project, project_details), timeout=_STOP_POLL_INTERVAL)
             return
+        except queue.Full:
+            continue
 
-        print(f"Found {len(vercel_projects)} Vercel projects. Processing...")
-        for project in vercel_projects:
-            project_id = project.get('id')
-            project_name = project.get('name')
-            print(f"\n--- Processing Vercel Project: {project_name} (ID: {project_id}) ---")
-            if not project_id:
-                print("Skipping project: Missing ID.")
-                continue
-            
-            project_details = get_vercel_project_details(args.vercel_token, project_id)
-            if project_details:
-                # Check if project is suitable for automatic migration (e.g., GitHub linked)
-                if project_details.get('info', {}).get('link', {}).get('type') == 'github':
-                     create_cloudflare_pages_project(args.cf_token, args.cf_account_id, project_details)
-                else:
-                    print(f"Skipping automatic migration for '{project_name}': Project is not linked via GitHub or link type is unsupported.")
-                    print("Manual migration or direct upload to Cloudflare Pages might be required.")
-            else:
-                print(f"Skipping project {project_name}: Failed to fetch details.")
+def _create_projects_worker(args, details_q, stop):
+    """Creates Cloudflare Pages projects from the queue until a None sentinel arrives."""
+    while not stop.is_set():
+        try:
+            item = details_q.get(timeout=_STOP_POLL_INTERVAL)
+        except queue.Empty:
+            continue
+        if item is None or stop.is_set():
+            return
+        project, project_details = item
+        try:
+            process_project(args, project, project_details)
+        except Exception:
+            logger.exception("Unexpected error migrating Vercel project %s", project.get('name'))
 
-    print("\nMigration process finished.")
+def process_project(args, project, project_details):
+    """Creates the Cloudflare Pages project for one Vercel project, if suitable."""
+    project_id = project.get('id')
+    project_name = project.get('name')
+    logger.info("--- Processing Vercel Project: %s (ID: %s) ---", project_name, project_id)
+    if project_details:
+        # Check if project is suitable for automatic migration (e.g., GitHub linked)
+        if is_github_project(project_details.get('info', {})):
+            create_cloudflare_pages_project(args.cf_account_id, project_details)
+        else:
+            logger.warning("Skipping automatic migration for '%s': Project is not linked via GitHub or link type is unsupported.", project_name)
+            logger.warning("Project '%s': Manual migration or direct upload to Cloudflare Pages might be required.", project_name)
+    else:
+        logger.warning("Skipping project %s: Failed to fetch details.", project_name)
 
 if __name__ == "__main__":
     main()